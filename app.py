@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import duckdb
+from functools import reduce
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 
 
@@ -31,8 +35,7 @@ if not st.session_state.logged_in:
 # ——————————————————————————————
 # 0) PAGE CONFIG & CSS
 # ——————————————————————————————
-st.set_page_config(page_title="Heart Disease Dashboard", layout="wide")
-st.markdown("""
+CSS = """
     <style>
       .block-container { padding-top: 0rem; }
       .main-title { font-size: 2.1rem; margin-bottom: 0.7rem; }
@@ -46,38 +49,175 @@ st.markdown("""
           margin-bottom: 16px;
       }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+st.set_page_config(page_title="Heart Disease Dashboard", layout="wide")
+# re-emitted on every rerun on purpose: Streamlit drops any element a run
+# doesn't re-render, so injecting it once per session would lose the styles
+st.markdown(CSS, unsafe_allow_html=True)
 
 # ——————————————————————————————
 # 1) LOAD & PREPROCESS
 # ——————————————————————————————
+CUBE_KEYS = ['Age Group','chest_pain_type','st_slope','Sex: Male','resting_ecg',
+             'Exercise-Induced Angina: Yes']
+
+def is_cat(d, k):
+    return isinstance(d[k].dtype, pd.CategoricalDtype)
+
+def key_codes(d, k):
+    return d[k].cat.codes.values if is_cat(d, k) else d[k].values
+
+def key_levels(d, k):
+    # categories of a categorical key; the 0/1 flag columns have two levels
+    return d[k].cat.categories if is_cat(d, k) else pd.Index([0,1])
+
 @st.cache_data
 def load_data():
-    df = pd.read_csv("heart_cleaned_fe.csv")
-    bins = [29, 40, 50, 60, 70, df.age.max()]
-    labels = ['30-40','41-50','51-60','61-70','71+']
-    df['Age Group'] = pd.cut(df.age, bins=bins, labels=labels)
-    return df
+    # typed, columnar copy of heart_cleaned_fe.csv (built by build_parquet.py);
+    # dtypes and the Age Group categorical come back as stored
+    df = pd.read_parquet("heart_cleaned_fe.parquet", engine='pyarrow')
+    # label per cube cell along each axis; also the sidebar options, so reruns
+    # never scan a column with unique()
+    levels = {k: key_levels(df, k) for k in CUBE_KEYS}
+    # global contingency cube (count and heart_disease positives) over every
+    # filter/group key, built once; the count panels only ever slice and sum it
+    shape = tuple(len(levels[k]) for k in CUBE_KEYS)
+    codes = np.stack([key_codes(df, k) for k in CUBE_KEYS]).astype(np.intp)
+    ok = codes[0] >= 0  # ages outside the Age Group bins have code -1
+    cube_n, cube_pos = np.zeros(shape, dtype=np.int64), np.zeros(shape, dtype=np.int64)
+    np.add.at(cube_n, tuple(codes[:, ok]), 1)
+    np.add.at(cube_pos, tuple(codes[:, ok]), df['heart_disease'].values[ok])
+    return df, cube_n, cube_pos, levels
 
-df = load_data()
+df, cube_n, cube_pos, LEVELS = load_data()
 
 # ——————————————————————————————
 # 2) SIDEBAR FILTERS
 # ——————————————————————————————
+CP_TYPES   = LEVELS['chest_pain_type'].tolist()
+ECG_TYPES  = LEVELS['resting_ecg'].tolist()
+AGE_GROUPS = LEVELS['Age Group'].tolist()
+
 st.sidebar.header("Filters")
-cp  = st.sidebar.multiselect("Chest Pain Type", df.chest_pain_type.unique(), df.chest_pain_type.unique())
-ecg = st.sidebar.selectbox("Resting ECG", ['All'] + df.resting_ecg.unique().tolist())
-ag  = st.sidebar.multiselect("Age Group", df['Age Group'].cat.categories.tolist(), df['Age Group'].cat.categories.tolist())
+cp  = st.sidebar.multiselect("Chest Pain Type", CP_TYPES, CP_TYPES)
+ecg = st.sidebar.selectbox("Resting ECG", ['All'] + ECG_TYPES)
+ag  = st.sidebar.multiselect("Age Group", AGE_GROUPS, AGE_GROUPS)
 ang = st.sidebar.checkbox("Exercise-Induced Angina: Yes")
 sex = st.sidebar.selectbox("Sex", ['All','Male','Female'])
 
-d = df[df.chest_pain_type.isin(cp)]
-if ecg!='All': d = d[d.resting_ecg==ecg]
-d = d[d['Age Group'].isin(ag)]
-if ang:        d = d[d['Exercise-Induced Angina: Yes']==1]
-if sex!='All':
-    val = 1 if sex=='Male' else 0
-    d = d[d['Sex: Male']==val]
+filters = (tuple(sorted(cp)), ecg, tuple(sorted(ag)), ang, sex)
+
+# ——————————————————————————————
+# 2b) CACHED AGGREGATIONS (keyed by the filter tuple)
+# ——————————————————————————————
+CORR_COLS  = ['age','resting_bp','cholesterol','max_hr','oldpeak','fasting_bs']
+RENAME_MAP = {
+    'age':'Age','resting_bp':'Resting BP','cholesterol':'Cholesterol',
+    'max_hr':'MaxHR','oldpeak':'ST Depression','fasting_bs':'Fasting BS'
+}
+CORR_LABELS = [RENAME_MAP[c] for c in CORR_COLS]
+
+# the correlation panel is the one aggregate that still needs raw rows, so its
+# filter + aggregate runs as a single parameterised query in DuckDB
+CORR_DB_COLS = CORR_COLS + ['heart_disease','Sex: Male','chest_pain_type','Age Group','resting_ecg',
+                            'Exercise-Induced Angina: Yes']
+CORR_SQL = f"""
+    SELECT "Sex: Male", {', '.join(f'corr({c}, heart_disease)' for c in CORR_COLS)}
+    FROM heart
+    WHERE list_contains($cp, chest_pain_type::VARCHAR)
+      AND list_contains($ag, "Age Group"::VARCHAR)
+      AND ($ecg = 'All' OR resting_ecg::VARCHAR = $ecg)
+      AND (NOT $ang OR "Exercise-Induced Angina: Yes" = 1)
+      AND ($sex = 'All' OR "Sex: Male" = ($sex = 'Male')::INTEGER)
+    GROUP BY "Sex: Male"
+    ORDER BY "Sex: Male" DESC
+"""
+
+@st.cache_resource
+def get_db():
+    # one in-memory database per process holding a columnar copy of the
+    # columns CORR_SQL reads; callers take a cursor, since a single
+    # connection isn't thread-safe
+    con = duckdb.connect()
+    con.register('heart_df', df[CORR_DB_COLS])
+    con.execute("CREATE TABLE heart AS SELECT * FROM heart_df")
+    con.unregister('heart_df')
+    return con
+
+@st.cache_data
+def agg_cube(cp, ecg, ag, ang, sex):
+    # the filtered cube is the global one with unselected slices zeroed out;
+    # angina is only ever a filter, so its axis is summed away here
+    keep = [
+        LEVELS['Age Group'].isin(ag),
+        LEVELS['chest_pain_type'].isin(cp),
+        np.ones(len(LEVELS['st_slope']), dtype=bool),
+        np.array([sex!='Male', sex!='Female']),
+        LEVELS['resting_ecg'].isin([ecg]) if ecg!='All' else np.ones(len(LEVELS['resting_ecg']), dtype=bool),
+        np.array([not ang, True]),
+    ]
+    w = reduce(np.multiply.outer, keep)
+    return np.where(w, cube_n, 0).sum(axis=-1), np.where(w, cube_pos, 0).sum(axis=-1)
+
+# the aggregates below are dense numpy arrays indexed like the cube axes
+# (see LEVELS), so the panels slice arrays rather than filter frames
+def cube_sum(cube, keys):
+    # sum the filtered cube down to `keys`, which keep their cube-axis order
+    n, pos = cube
+    drop = tuple(i for i, k in enumerate(CUBE_KEYS[:-1]) if k not in keys)  # angina already summed away
+    return n.sum(axis=drop), pos.sum(axis=drop)
+
+@st.cache_data
+def agg_mosaic(cp, ecg, ag, ang, sex):
+    # share of each chest_pain_type within its Age Group: one division of the
+    # (Age Group x chest_pain_type) counts by their broadcast row sums
+    M, _ = cube_sum(agg_cube(cp, ecg, ag, ang, sex), ['Age Group','chest_pain_type'])
+    with np.errstate(invalid='ignore'):
+        return M, M/M.sum(1, keepdims=True)
+
+@st.cache_data
+def agg_ecg(cp, ecg, ag, ang, sex):
+    # count and disease % from the same sum, in category order
+    n, pos = cube_sum(agg_cube(cp, ecg, ag, ang, sex), ['resting_ecg'])
+    hit = n>0
+    return LEVELS['resting_ecg'][hit], n[hit], pos[hit]/n[hit]*100
+
+@st.cache_data
+def agg_heat(cp, ecg, ag, ang, sex):
+    # rate matrix (Age Group x st_slope) over the groups that have any rows
+    n, pos = cube_sum(agg_cube(cp, ecg, ag, ang, sex), ['Age Group','st_slope'])
+    rows, cols = n.sum(1)>0, n.sum(0)>0
+    with np.errstate(invalid='ignore'):
+        z = pos[rows][:, cols]/n[rows][:, cols]*100
+    # cell labels formatted once here, not by plotly's text_auto on every render
+    text = np.where(np.isnan(z), '', np.char.mod('%.1f', z))
+    return z, text, LEVELS['st_slope'][cols], LEVELS['Age Group'][rows]
+
+@st.cache_data
+def agg_bubble(cp, ecg, ag, ang, sex):
+    # count and disease % per (chest_pain_type, Sex)
+    n, pos = cube_sum(agg_cube(cp, ecg, ag, ang, sex), ['chest_pain_type','Sex: Male'])
+    with np.errstate(invalid='ignore'):
+        return n, pos/n*100
+
+@st.cache_data
+def agg_corr(cp, ecg, ag, ang, sex):
+    # [male, female] |corr| vectors when both sexes are present, else [overall]
+    with get_db().cursor() as cur:
+        rows = cur.execute(
+            CORR_SQL, {'cp': list(cp), 'ecg': ecg, 'ag': list(ag), 'ang': ang, 'sex': sex}
+        ).fetchall()
+    if not rows:
+        return [np.full(len(CORR_COLS), np.nan)]
+    return [np.abs(np.array(r[1:], dtype=float)) for r in rows]
+
+@st.cache_data
+def agg_trend(cp, ecg, ag, ang, sex):
+    # count and disease rate per (Age Group, chest_pain_type)
+    n, pos = cube_sum(agg_cube(cp, ecg, ag, ang, sex), ['Age Group','chest_pain_type'])
+    with np.errstate(invalid='ignore'):
+        return n, pos/n
 
 # ——————————————————————————————
 # 3) TITLE
@@ -90,140 +230,189 @@ st.markdown("<div class='main-title'>💓 Heart Disease Dashboard</div>", unsafe
 tile_h = 250
 marg   = dict(l=20, r=20, t=20, b=20)
 
-top = st.columns(3)
-bot = st.columns(3)
+BLUE_RED = [[0,'royalblue'],[1,'firebrick']]
+
+# st.plotly_chart serialises each figure with plotly.io.to_json; pin orjson
+# rather than relying on 'auto' so a missing install fails loudly
+pio.json.config.default_engine = 'orjson'
 
+# one Figure skeleton per tile lives in session state; reruns only patch its
+# trace data, so together with the fixed chart key the frontend diffs the
+# traces (Plotly.react) instead of tearing the plot down with newPlot.
+# Trace data goes in as plain lists of the already-aggregated values (each
+# tile has at most a few dozen points), which skips plotly's per-value numpy
+# type sniffing, and theme=None skips Streamlit's theme re-injection.
+def get_fig(key, build):
+    if key not in st.session_state:
+        st.session_state[key] = build()
+    return st.session_state[key]
+
+def build_fig1():
+    fig = go.Figure([
+        go.Bar(name=c, marker_color=px.colors.qualitative.Safe[i],
+               hovertemplate=f'chest_pain_type={c}<br>Age Group=%{{x}}<br>% Patients=%{{y}}<extra></extra>')
+        for i, c in enumerate(CP_TYPES)
+    ])
+    fig.update_layout(
+        barmode='stack', height=tile_h, margin=marg, yaxis_tickformat='.0%', showlegend=False,
+        xaxis=dict(title='Age Group', categoryorder='array', categoryarray=AGE_GROUPS),
+        yaxis_title='% Patients'
+    )
+    return fig
+
+def build_fig2():
+    fig = make_subplots(specs=[[{'secondary_y':True}]])
+    fig.add_trace(go.Bar(marker_color='teal'), secondary_y=False)
+    fig.add_trace(go.Scatter(mode='lines+markers', marker_color='crimson'), secondary_y=True)
+    fig.update_layout(height=tile_h, margin=marg, showlegend=False)
+    fig.update_yaxes(title_text='Count', secondary_y=False)
+    fig.update_yaxes(title_text='Disease %', secondary_y=True, tickformat='.0f')
+    return fig
+
+def build_fig3():
+    fig = go.Figure(go.Heatmap(
+        coloraxis='coloraxis', texttemplate='%{text}',
+        hovertemplate='st_slope: %{x}<br>Age Group: %{y}<br>Disease %: %{z}<extra></extra>'
+    ))
+    fig.update_layout(
+        height=tile_h, margin=marg,
+        coloraxis=dict(colorscale=BLUE_RED, colorbar_title_text='Disease %'),
+        xaxis_title='st_slope', yaxis=dict(title='Age Group', autorange='reversed')
+    )
+    return fig
+
+def build_fig4():
+    fig = go.Figure([
+        # WebGL markers: no SVG node per bubble to re-layout on filter changes
+        go.Scattergl(name=sx, mode='markers',
+                     marker=dict(color=px.colors.qualitative.Plotly[i], sizemode='area', opacity=0.7,
+                                 line=dict(width=1, color='DarkSlateGrey')),
+                     hovertemplate=f'Sex={sx}<br>Chest Pain Type=%{{x}}<br>Disease %=%{{y:.1f}}<br>N=%{{marker.size}}<extra></extra>')
+        for i, sx in enumerate(['Female','Male'])
+    ])
+    fig.update_layout(
+        height=tile_h, margin=marg,
+        yaxis=dict(range=[0,100], ticksuffix='%', title='Disease %'),
+        xaxis=dict(title='Chest Pain Type', categoryorder='array', categoryarray=CP_TYPES),
+        legend_title='Sex'
+    )
+    return fig
+
+def build_fig5_split():
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(name='Male', fill='toself', line_color='royalblue'))
+    fig.add_trace(go.Scatterpolar(name='Female', fill='toself', line_color='firebrick'))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, tickformat='.2f')),
+        height=tile_h, margin=marg
+    )
+    return fig
+
+def build_fig5_all():
+    fig = go.Figure(go.Barpolar(
+        marker_coloraxis='coloraxis',
+        hovertemplate='|Corr|=%{r}<br>Feature=%{theta}<extra></extra>'
+    ))
+    fig.update_layout(
+        height=tile_h, margin=marg, showlegend=False,
+        coloraxis=dict(colorscale=BLUE_RED, colorbar_title_text='|Corr|'),
+        polar=dict(angularaxis=dict(direction='clockwise', rotation=90))
+    )
+    return fig
+
+def build_fig6():
+    fig = go.Figure([
+        go.Scatter(name=c, mode='lines+markers', line_color=px.colors.qualitative.Plotly[i],
+                   hovertemplate=f'chest_pain_type={c}<br>Age Group=%{{x}}<br>Disease %=%{{y}}<extra></extra>')
+        for i, c in enumerate(CP_TYPES)
+    ])
+    fig.update_layout(
+        height=tile_h, margin=marg, showlegend=False,
+        xaxis=dict(title='Age Group', categoryorder='array', categoryarray=AGE_GROUPS),
+        yaxis_title='Disease %'
+    )
+    fig.update_yaxes(tickformat='.0%', range=[0,1])
+    return fig
+
+# one function per tile, called inside its grid column below
 # Row1 Col1: Chest Pain % by Age Group
-with top[0]:
+def panel1(filters):
     st.markdown("<div class='chart-title'>Chest Pain % by Age Group</div>", unsafe_allow_html=True)
-    mos = d.groupby(['Age Group','chest_pain_type']).size().reset_index(name='count')
-    mos['pct'] = mos['count']/mos.groupby('Age Group')['count'].transform('sum')
-    fig1 = px.bar(
-        mos, x='Age Group', y='pct', color='chest_pain_type',
-        barmode='stack', color_discrete_sequence=px.colors.qualitative.Safe,
-        labels={'pct':'% Patients'}
-    )
-    fig1.update_layout(height=tile_h, margin=marg, yaxis_tickformat='.0%', showlegend=False)
-    st.plotly_chart(fig1, use_container_width=True, key="fig1")
+    M, P = agg_mosaic(*filters)
+    fig1 = get_fig('_fig1', build_fig1)
+    for j, tr in enumerate(fig1.data):  # one stacked trace per chest_pain_type level
+        hit = M[:, j]>0
+        tr.x, tr.y = LEVELS['Age Group'][hit].tolist(), P[hit, j].tolist()
+    st.plotly_chart(fig1, use_container_width=True, theme=None, key="fig1")
 
 # Row1 Col2: ECG Count & Disease %
-with top[1]:
+def panel2(filters):
     st.markdown("<div class='chart-title'>ECG Count & Disease %</div>", unsafe_allow_html=True)
-    ct = d.resting_ecg.value_counts().reset_index(name='count')
-    ct.columns = ['ecg','count']
-    rt = d.groupby('resting_ecg')['heart_disease'].mean().reset_index(name='rate')
-    rt['rate'] *= 100
-    df_e = ct.merge(rt, left_on='ecg', right_on='resting_ecg')
-    fig2 = make_subplots(specs=[[{'secondary_y':True}]])
-    fig2.add_trace(go.Bar(x=df_e['ecg'], y=df_e['count'], marker_color='teal'), secondary_y=False)
-    fig2.add_trace(go.Scatter(x=df_e['ecg'], y=df_e['rate'], mode='lines+markers', marker_color='crimson'), secondary_y=True)
-    fig2.update_layout(height=tile_h, margin=marg, showlegend=False)
-    fig2.update_yaxes(title_text='Count', secondary_y=False)
-    fig2.update_yaxes(title_text='Disease %', secondary_y=True, tickformat='.0f')
-    st.plotly_chart(fig2, use_container_width=True, key="fig2")
+    ecgs, count, rate = agg_ecg(*filters)
+    fig2 = get_fig('_fig2', build_fig2)
+    fig2.data[0].x, fig2.data[0].y = ecgs.tolist(), count.tolist()
+    fig2.data[1].x, fig2.data[1].y = ecgs.tolist(), rate.tolist()
+    st.plotly_chart(fig2, use_container_width=True, theme=None, key="fig2")
 
 # Row1 Col3: Heatmap: Age vs ST Slope
-with top[2]:
+def panel3(filters):
     st.markdown("<div class='chart-title'>Heatmap: Age Group vs ST Slope</div>", unsafe_allow_html=True)
-    heat = d.groupby(['Age Group','st_slope'])['heart_disease'].mean().reset_index()
-    heat = heat.pivot(index='Age Group', columns='st_slope', values='heart_disease') * 100
-    fig3 = px.imshow(
-        heat, text_auto='.1f',
-        color_continuous_scale=['royalblue','firebrick'],
-        labels={'color':'Disease %'}
-    )
-    fig3.update_layout(height=tile_h, margin=marg)
-    st.plotly_chart(fig3, use_container_width=True, key="fig3")
+    z, text, slopes, ages = agg_heat(*filters)
+    fig3 = get_fig('_fig3', build_fig3)
+    fig3.data[0].update(z=z.tolist(), text=text.tolist(), x=slopes.tolist(), y=ages.tolist())
+    st.plotly_chart(fig3, use_container_width=True, theme=None, key="fig3")
 
 # Row2 Col1: Disease % by Chest Pain Type (Bubble)
-with bot[0]:
+def panel4(filters):
     st.markdown("<div class='chart-title'>Disease % by Chest Pain Type</div>", unsafe_allow_html=True)
-    df4 = (
-        d.groupby(['Sex: Male','chest_pain_type'])
-         .agg(count=('heart_disease','size'),
-              rate =('heart_disease','mean'))
-         .reset_index()
-    )
-    df4['rate'] *= 100
-    df4['Sex'] = df4['Sex: Male'].map({0:'Female',1:'Male'})
-    fig4 = px.scatter(
-        df4,
-        x='chest_pain_type',
-        y='rate',
-        size='count',
-        color='Sex',
-        size_max=40,
-        labels={'chest_pain_type':'Chest Pain Type','rate':'Disease %','count':'N'},
-        hover_data={'count':True,'rate':':.1f'}
-    )
-    fig4.update_traces(marker=dict(opacity=0.7, line=dict(width=1, color='DarkSlateGrey')))
-    fig4.update_layout(
-        height=tile_h, margin=marg,
-        yaxis=dict(range=[0,100], ticksuffix='%'),
-        xaxis_title='Chest Pain Type',
-        legend_title='Sex'
-    )
-    st.plotly_chart(fig4, use_container_width=True, key="fig4")
+    n, rate = agg_bubble(*filters)
+    fig4 = get_fig('_fig4', build_fig4)
+    # same area scaling as px.scatter(size_max=40)
+    sizeref = float(2*n.max()/40**2) if n.any() else 1
+    for s, tr in enumerate(fig4.data):  # traces are Female, Male = Sex: Male codes
+        hit = n[:, s]>0
+        tr.x, tr.y = LEVELS['chest_pain_type'][hit].tolist(), rate[hit, s].tolist()
+        tr.marker.update(size=n[hit, s].tolist(), sizeref=sizeref)
+        tr.showlegend = bool(hit.any())
+    st.plotly_chart(fig4, use_container_width=True, theme=None, key="fig4")
 
 # Row2 Col2: Absolute Correlation with Heart Disease
-with bot[1]:
+def panel5(filters):
     st.markdown("<div class='chart-title'>Abs Correlation with Heart Disease</div>", unsafe_allow_html=True)
-    # include "fasting_bs", "max_hr", "resting_bp"
-    cols = ['age','resting_bp','cholesterol','max_hr','oldpeak','fasting_bs']
+    corr = agg_corr(*filters)
 
     # correlation split by sex?
-    if d['Sex: Male'].nunique()>1:
-        cm = (d[d['Sex: Male']==1][cols+['heart_disease']].corr()['heart_disease'].abs()
-                .drop('heart_disease').reset_index(name='corr'))
-        cf = (d[d['Sex: Male']==0][cols+['heart_disease']].corr()['heart_disease'].abs()
-                .drop('heart_disease').reset_index(name='corr'))
-
-        # rename columns for display
-        rename_map = {
-            'age':'Age','resting_bp':'Resting BP','cholesterol':'Cholesterol',
-            'max_hr':'MaxHR','oldpeak':'ST Depression','fasting_bs':'Fasting BS'
-        }
-        cm['index'] = cm['index'].replace(rename_map)
-        cf['index'] = cf['index'].replace(rename_map)
-
-        fig5 = go.Figure()
-        fig5.add_trace(go.Scatterpolar(theta=cm['index'], r=cm['corr'], name='Male',
-                                       fill='toself', line_color='royalblue'))
-        fig5.add_trace(go.Scatterpolar(theta=cf['index'], r=cf['corr'], name='Female',
-                                       fill='toself', line_color='firebrick'))
-        fig5.update_layout(
-            polar=dict(radialaxis=dict(visible=True, tickformat='.2f')),
-            height=tile_h, margin=marg
-        )
+    if len(corr)>1:
+        cm, cf = corr
+        fig5 = get_fig('_fig5_split', build_fig5_split)
+        fig5.data[0].theta, fig5.data[0].r = CORR_LABELS, cm.tolist()
+        fig5.data[1].theta, fig5.data[1].r = CORR_LABELS, cf.tolist()
     else:
-        c0 = (d[cols+['heart_disease']].corr()['heart_disease'].abs()
-               .drop('heart_disease').reset_index(name='corr'))
-        rename_map = {
-            'age':'Age','resting_bp':'Resting BP','cholesterol':'Cholesterol',
-            'max_hr':'MaxHR','oldpeak':'ST Depression','fasting_bs':'Fasting BS'
-        }
-        c0['index'] = c0['index'].replace(rename_map)
-
-        fig5 = px.bar_polar(
-            c0, r='corr', theta='index',
-            color='corr', color_continuous_scale=['royalblue','firebrick'],
-            labels={'corr':'|Corr|','index':'Feature'}
-        )
-        fig5.update_layout(height=tile_h, margin=marg, showlegend=False)
-
-    st.plotly_chart(fig5, use_container_width=True, key="fig5")
+        c0 = corr[0]
+        fig5 = get_fig('_fig5_all', build_fig5_all)
+        fig5.data[0].update(theta=CORR_LABELS, r=c0.tolist(), marker_color=c0.tolist())
+
+    st.plotly_chart(fig5, use_container_width=True, theme=None, key="fig5")
 
 # Row2 Col3: Trend: Age Group & Chest Pain
-with bot[2]:
+def panel6(filters):
     st.markdown("<div class='chart-title'>Trend: Age Group & Chest Pain</div>", unsafe_allow_html=True)
-    ln = d.groupby(['Age Group','chest_pain_type'])['heart_disease'].mean().reset_index(name='rate')
-    fig6 = px.line(
-        ln, x='Age Group', y='rate', color='chest_pain_type', markers=True,
-        labels={'rate':'Disease %'}
-    )
-    fig6.update_layout(height=tile_h, margin=marg, showlegend=False)
-    fig6.update_yaxes(tickformat='.0%', range=[0,1])
-    st.plotly_chart(fig6, use_container_width=True, key="fig6")
+    n, rate = agg_trend(*filters)
+    fig6 = get_fig('_fig6', build_fig6)
+    for j, tr in enumerate(fig6.data):  # one trace per chest_pain_type level
+        hit = n[:, j]>0
+        tr.x, tr.y = LEVELS['Age Group'][hit].tolist(), rate[hit, j].tolist()
+    st.plotly_chart(fig6, use_container_width=True, theme=None, key="fig6")
+
+top = st.columns(3)
+bot = st.columns(3)
+
+with top[0]: panel1(filters)
+with top[1]: panel2(filters)
+with top[2]: panel3(filters)
+with bot[0]: panel4(filters)
+with bot[1]: panel5(filters)
+with bot[2]: panel6(filters)
 
 st.markdown("---")
 st.write("*Use the sidebar filters to refresh all six panels.*")
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+# ——————————————————————————————
+# One-time CSV -> Parquet conversion for app.py
+# Rerun after regenerating heart_cleaned_fe.csv:  python build_parquet.py
+# ——————————————————————————————
+
+# narrowest dtypes that hold the data; categorical keys hash on int codes
+# in groupby/isin instead of strings
+df = pd.read_csv("heart_cleaned_fe.csv", dtype={
+    'heart_disease':'int8', 'Sex: Male':'int8', 'Exercise-Induced Angina: Yes':'int8',
+    'fasting_bs':'int8', 'age':'int8',
+    'resting_bp':'int16', 'cholesterol':'int16', 'max_hr':'int16',
+    'oldpeak':'float32',
+    'chest_pain_type':'category', 'resting_ecg':'category', 'st_slope':'category'
+})
+# Age Group bins are right-closed like pd.cut: (29,40], (40,50], ..., (70,max];
+# side='left' puts a boundary age such as 40 in the lower bin, and ages <= 29
+# get code -1 (NaN), as they fell outside pd.cut's first edge
+edges  = np.array([40, 50, 60, 70], dtype=np.int8)
+labels = ['30-40','41-50','51-60','61-70','71+']
+age    = df.age.values
+codes  = np.searchsorted(edges, age, side='left').astype(np.int8)
+codes[age <= 29] = -1
+df['Age Group'] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+
+df.to_parquet("heart_cleaned_fe.parquet", engine='pyarrow', index=False)
+print(f"wrote heart_cleaned_fe.parquet ({len(df)} rows)")